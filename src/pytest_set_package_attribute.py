@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+.. default-role:: code
+
+A pytest plugin which runs script-style test modules in-process.
+
+Test modules inside packages which use `set_package_attribute` usually have to be
+run as scripts, each in its own interpreter.  This plugin instead runs each such
+module inside the pytest process as the `__main__` module, the same way the
+interpreter runs a script, so `set_package_attribute.init` sets its
+`__package__` attribute as usual.  Any code at the module level, such as
+`assert` statements, is the test.
+
+The plugin is installed along with `set_package_attribute`, but it is not
+registered with pytest automatically.  It needs pytest 7 or later, and it is
+enabled with the `-p` option or in the ini file.  It then does nothing unless
+the ini option `script_test_files` is set to a list of glob patterns.  Test
+files (as selected by the usual `python_files` option) whose names match one of
+the patterns are run as scripts rather than imported::
+
+   [pytest]
+   addopts = -p pytest_set_package_attribute
+   script_test_files = test_*.py
+
+The same can be done from the command line with
+`-p pytest_set_package_attribute -o script_test_files=test_*.py`.
+
+Between tests the state of the import system, i.e., `sys.modules`, `sys.path`,
+`sys.meta_path`, `sys.argv` and `builtins.__import__`, is restored to what it was
+before the test, along with the module globals of `set_package_attribute`, the
+`multiprocessing` spawn hook it installs, and whether the garbage collector is
+enabled and its objects frozen.  Taking the snapshot makes a full shallow copy of
+those containers, since the import system offers no way to record only the
+changes to `sys.modules`.  Restoring it only touches the entries which changed.
+Modules newly imported from outside the pytest root directory, such as standard
+library modules, are kept in `sys.modules`, since importing them again would
+create second copies of their process-wide state.  Any other process-wide state
+which a script changes is not restored.  In particular functions a script
+registers with `atexit` run at the end of the pytest session, and a script
+which changes the state of imported modules can affect later tests.  With
+`pytest-xdist` each worker process runs its tests in the same way.
+
+So that the `__init__.py` files of the packages containing the scripts are only
+run by the scripts themselves, package directories are collected as plain
+directories while the plugin is active.
+"""
+
+from __future__ import print_function, division, absolute_import
+import gc
+import os
+import sys
+import types
+import fnmatch
+from multiprocessing import spawn
+
+try:
+    import builtins
+except ImportError: # Python 2.
+    import __builtin__ as builtins
+
+import pytest
+import set_package_attribute
+
+_pytest_major_version = int(pytest.__version__.split(".")[0])
+
+def pytest_addoption(parser):
+    parser.addini("script_test_files", type="args", default=[],
+                  help="Glob patterns of test files to run in-process as scripts,"
+                       " i.e., as the __main__ module.")
+
+def pytest_configure(config):
+    if config.getini("script_test_files") and _pytest_major_version < 7:
+        raise pytest.UsageError("The script_test_files option of"
+                                " pytest_set_package_attribute needs pytest 7 or"
+                                " later.")
+
+@pytest.hookimpl(tryfirst=True, optionalhook=True) # The hook is new in pytest 8.
+def pytest_collect_directory(path, parent):
+    if parent.config.getini("script_test_files"):
+        return pytest.Dir.from_parent(parent, path=path)
+    return None
+
+if _pytest_major_version >= 7: # Earlier versions pass `path` instead of `module_path`.
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_pycollect_makemodule(module_path, parent):
+        patterns = parent.config.getini("script_test_files")
+        if not patterns:
+            return None
+        if module_path.name == "__init__.py" and _pytest_major_version < 8:
+            return ScriptPackage.from_parent(parent, path=module_path)
+        if any(fnmatch.fnmatch(module_path.name, pattern) for pattern in patterns):
+            return ScriptFile.from_parent(parent, path=module_path)
+        return None
+
+class ScriptPackage(pytest.Package):
+    """A package directory which is collected without importing its `__init__`
+    module, used before pytest 8.  Its setup and teardown functions are not
+    run."""
+
+    def setup(self):
+        pass
+
+class ScriptFile(pytest.File):
+    """A test file which is run as a script, as a single test item."""
+
+    def collect(self):
+        yield ScriptItem.from_parent(self, name=self.path.name)
+
+class ScriptItem(pytest.Item):
+    """A test item which runs its file in-process as the `__main__` module."""
+
+    def runtest(self):
+        snapshot = ImportStateSnapshot(str(self.config.rootpath))
+        try:
+            run_as_main(str(self.path))
+            set_package_attribute.wait_for_background_init()
+        finally:
+            snapshot.restore()
+
+    def reportinfo(self):
+        return self.path, 0, "script: {0}".format(self.name)
+
+def run_as_main(script_file):
+    """Run the file `script_file` as the `__main__` module, the way the interpreter
+    runs a script.  The caller should save and restore the import state."""
+    script_file = os.path.abspath(script_file)
+    main_module = types.ModuleType("__main__")
+    main_module.__file__ = script_file
+    sys.modules["__main__"] = main_module
+    sys.path.insert(0, os.path.dirname(script_file))
+    sys.argv[:] = [script_file]
+    with open(script_file, "rb") as f:
+        code = compile(f.read(), script_file, "exec", dont_inherit=True)
+    exec(code, main_module.__dict__)
+
+class ImportStateSnapshot(object):
+    """A snapshot of the import state, which `restore` puts back.  The snapshot is a
+    shallow copy of `sys.modules`, the module globals of `set_package_attribute`
+    and the other containers, but `restore` only changes the entries which differ
+    from it.  New modules are only removed from `sys.modules` if they were loaded
+    from inside the directory `rollback_dirname`."""
+
+    def __init__(self, rollback_dirname):
+        self.rollback_dirname = os.path.abspath(rollback_dirname)
+        self.modules = dict(sys.modules)
+        self.path = list(sys.path)
+        self.meta_path = list(sys.meta_path)
+        self.argv = list(sys.argv)
+        self.import_function = builtins.__import__
+        self.module_globals = dict(vars(set_package_attribute))
+        self.get_preparation_data = spawn.get_preparation_data
+        self.gc_enabled = gc.isenabled()
+        self.gc_freeze_count = gc.get_freeze_count() if hasattr(gc, "freeze") else 0
+
+    def restore(self):
+        """Restore the import state in place, changing only what differs."""
+        modules = sys.modules
+        for name in [name for name in modules if name not in self.modules]:
+            if _is_loaded_from(modules[name], self.rollback_dirname):
+                del modules[name]
+        for name, module in self.modules.items():
+            if modules.get(name) is not module:
+                modules[name] = module
+        if sys.path != self.path:
+            sys.path[:] = self.path
+        if sys.meta_path != self.meta_path:
+            sys.meta_path[:] = self.meta_path
+        sys.argv[:] = self.argv
+        builtins.__import__ = self.import_function
+        _restore_namespace(vars(set_package_attribute), self.module_globals)
+        spawn.get_preparation_data = self.get_preparation_data
+        if self.gc_enabled:
+            gc.enable()
+        else:
+            gc.disable()
+        # Only objects frozen by the test can be unfrozen, with everything else.
+        if self.gc_freeze_count == 0 and hasattr(gc, "freeze"):
+            gc.unfreeze()
+
+def _restore_namespace(namespace, saved_namespace):
+    """Make the dict `namespace` equal to `saved_namespace`, changing only the
+    entries which differ."""
+    for name in [name for name in namespace if name not in saved_namespace]:
+        del namespace[name]
+    for name, value in saved_namespace.items():
+        if namespace.get(name, saved_namespace) is not value:
+            namespace[name] = value
+
+def _is_loaded_from(module, dirname):
+    """Return true if `module` was loaded from a file or directory inside `dirname`.
+    The module's namespace is read directly, so that lazy modules are not loaded."""
+    try:
+        namespace = object.__getattribute__(module, "__dict__")
+    except AttributeError:
+        return False
+    paths = [namespace.get("__file__")] + list(namespace.get("__path__") or [])
+    return any(path and os.path.abspath(path).startswith(dirname + os.sep)
+               for path in paths)
+
@@ -69,6 +69,16 @@ itself being discoverable on `sys.path`).  The guard conditional would not be
 required in this case, assuming the entry-point module is only ever used to
 start the application and is not imported from another Python file.
 
+Programs such as plugin hosts, which run files from inside packages with `exec`
+or `runpy.run_path` rather than as `__main__`, can use the `init_module`
+function to set the package context of an arbitrary module object or file
+pathname.  The `init_modules` function does the same for a whole sequence of
+modules and pathnames at once, importing the packages of each package tree
+only once::
+
+   module_name = set_package_attribute.init_module(plugin_path)
+   runpy.run_path(plugin_path, run_name=module_name)
+
 Installation
 ------------
 
@@ -103,6 +113,120 @@ Some technical notes
   the same as if the script file had been imported using its full,
   package-qualified module name.
 
+* Implicit namespace packages (PEP 420) have no `__init__.py` files, so by
+  default the search for the top-level package stops at them.  Calling
+  `init(namespace_packages=True)` instead takes the package to start just
+  below the closest directory above the script which is on `sys.path`.  Extra
+  root directories can be passed in the `roots` argument, as in
+  `init(namespace_packages=True, roots=["/path/to/monorepo"])`.  The set of
+  root directories is cached and reused by later calls in the same process.
+
+* Importing the package can add a lot of memory to a short-lived script.
+  Calling `init(trace_memory=True)` traces the memory allocated during the
+  import and attributes it to the modules imported, saving the report as
+  `set_package_attribute.import_memory_report`.  With
+  `print_memory_report=True` the top modules and the total are printed at
+  exit, and the `memory_budgets` argument, a dict such as
+  `{"pkg_toplevel.pkg_subdir": 10000000}`, warns about packages allocating
+  more than their budget of bytes.
+
+* Objects defined in a script pickle under the module name `__main__`, so a
+  `multiprocessing` or `concurrent.futures` worker process has to run the
+  script again to unpickle them.  Calling
+  `init(pickle_by_qualified_name=True)` gives `__main__` a spec under its full
+  package-qualified name, and the `qualify_main_names` function makes the
+  classes and functions defined by the script pickle by that name.  Spawned
+  worker processes then import the script's module once, under that name,
+  and use it as their main module; the directory containing the package is
+  put on the workers' `sys.path` for that.  If this module is not installed
+  where the workers can import it, such as when it is copied next to the
+  script, the workers instead run the script as usual and then import it.
+  Call `qualify_main_names` after the objects are defined, for example::
+
+     if __name__ == "__main__":
+         set_package_attribute.qualify_main_names()
+         with multiprocessing.Pool() as pool:
+             ...
+
+* Calling `init(background=True)` overlaps the package import with the
+  script's own startup work, such as argument parsing.  The `__package__`
+  attribute is set right away and the package, with its `__init__.py` files,
+  is imported on a worker thread.  Until that import ends `__import__` is
+  wrapped, so that the first import from the package by the script, or by any
+  other thread, waits for the whole import and re-raises any exception it
+  raised.  Waiting for just the modules needed could deadlock when the
+  package's `__init__.py` imports them too.  `wait_for_background_init` also
+  waits, and a failure which was never reported is warned about at exit.  In
+  this mode the script's module is added to `sys.modules` under
+  its full name before the package is imported rather than after, and the
+  directory containing the package is never put on `sys.path`.  Instead a
+  finder for just the top-level package is added to `sys.meta_path`.
+
+* The `lazy_import` function imports a module but defers loading it until its
+  first attribute access.  Relative names are resolved against the
+  `__package__` of the calling module, so after `init` a script can replace
+  `from . import heavy_module` with::
+
+     heavy_module = set_package_attribute.lazy_import(".heavy_module")
+
+  This works the same when the module is imported normally as part of its
+  package, and code paths such as `--help` which never use `heavy_module`
+  skip the cost of loading it.
+
+* When a script is run from a source checkout of a package which is also
+  installed, possibly with faster compiled extension modules, calling
+  `init(prefer_installed=True)` imports the installed copy rather than the
+  source tree.  Intra-package imports by the script then also come from the
+  installed copy, although the script itself still runs from the source
+  tree.  The string `set_package_attribute.package_copy_report` says which
+  copy was chosen.
+
+* On network and FUSE filesystems each check for an `__init__` file is a
+  round trip to the server, so the time to find the package grows with the
+  depth of the script in the directory tree.  On such filesystems all the
+  directories above the script are instead checked concurrently, in a small
+  thread pool.  The filesystem type is looked up in `/proc/mounts` where
+  available, which is read once per process, and only for scripts at least
+  four directory levels deep.  Setting the environment variable
+  `SET_PACKAGE_ATTRIBUTE_HIGH_LATENCY_FS` to `1` or `0` turns the mode on or
+  off regardless, as does the `high_latency_fs` argument to `init`.
+
+* Test modules which use `set_package_attribute` usually have to be run as
+  scripts, each in a separate interpreter.  The included pytest plugin
+  `pytest_set_package_attribute` runs them in-process as `__main__` instead,
+  restoring `sys.modules` and `sys.path` between tests.  It needs pytest 7 or
+  later.  It is enabled by loading it and setting the ini option
+  `script_test_files` to glob patterns for the script test files, for example
+  with `pytest -p pytest_set_package_attribute -o script_test_files=test_*.py`.
+
+* For an application whose entry point is a script run under a pre-forking
+  server, calling `init(prefork=True, preload=[".app", "heavy_library"])`
+  imports the package and the preloaded modules with the garbage collector
+  disabled, and then freezes the objects they created with `gc.freeze`.
+  Garbage collections in the forked worker processes then leave those
+  objects' memory pages alone, so the pages stay shared copy-on-write.  The
+  `forked_memory_report` function returns the shared and private memory of
+  the worker processes, on Linux.
+
+* By default the package is found from the real path of the script, with all
+  symlinks resolved.  With a symlinked deployment layout such as
+  `current -> releases/N`, or with symlinked editable installs, the rest of
+  the application may import the package through the symlinked path instead.
+  Calling `init(resolve_symlinks=False)` finds the package in the logical,
+  symlinked path space of the script, which matches such `sys.path` entries
+  and also avoids resolving every path component.  In this mode a warning is
+  issued at exit if any file was loaded as two separate modules, and the
+  `find_aliased_modules` function does the same check on demand.
+
+* With a long `sys.path` every top-level import looks in many directories
+  before it finds its module.  Calling `init(syspath_profile=filename)`
+  records in the given file which `sys.path` entries served the imports of
+  each run, and on later runs moves the package's directory (if it is on
+  `sys.path`) and the most-used entries to the front of `sys.path`.  An entry
+  is never moved ahead of an earlier entry which contains a module or
+  package of the same name, so no import is ever served by a different entry
+  and no new name shadowing can occur.
+
 * The basic mechanism still works if the guard conditional is left off.
   Without it, though, if a script in a *different* package/project were to
   explicitly or implicity import a module which itself imports and uses
@@ -141,10 +265,12 @@ When `init` is run this module searches for the module `__main__` in
 `sys.modules`.  If that module is not found then nothing is done.  If
 `__main__` is found then the `__package__` attribute for the `__main__` module
 is computed by going up the directory tree from its source file, looking for
-`__init__.py` files.  The `__package__` attribute is then set in the `__main__`
-module's namespace.  Only the `__main__` module is ever modified.  If there is
-already a `__package__` attribute in the namespace of `__main__` then nothing
-is done.
+`__init__.py` files.  Any other form of `__init__` module which the import
+system accepts also counts, such as a sourceless `__init__.pyc` file or a
+compiled `__init__` extension module.  The `__package__` attribute is then set
+in the `__main__` module's namespace.  Only the `__main__` module is ever
+modified.  If there is already a `__package__` attribute in the namespace of
+`__main__` then nothing is done.
 
 After setting the `__package__` attribute in the `__main__` module the package
 directory containing the `__main__` module is then imported, using its
@@ -180,10 +306,385 @@ Functions
 # running as a script.  Adding this would be backward compatible, so no rush.
 
 from __future__ import print_function, division, absolute_import
+import gc
 import os
 import sys
+import atexit
+from importlib import import_module
+
+# Modules which are only needed by some of the `init` options, such as `tracemalloc`
+# and `threading`, are imported inside the functions which use them, so that they
+# do not add to the startup time of every script.
+
+try:
+    from importlib.machinery import PathFinder, all_suffixes as _all_suffixes
+except ImportError: # Python 2.
+    PathFinder = None
+    import imp
+    def _all_suffixes():
+        return [suffix for suffix, mode, module_type in imp.get_suffixes()]
+
+# All the filenames a package `__init__` module can have, including sourceless
+# `.pyc` files and compiled extension modules.
+_init_filenames = frozenset("__init__" + suffix for suffix in _all_suffixes())
+
+def _is_package_dir(dirname):
+    """Return true if `dirname` contains any form of package `__init__` module which
+    the import system accepts.  Only a single directory listing is done."""
+    try:
+        return not _init_filenames.isdisjoint(os.listdir(dirname))
+    except OSError:
+        return False
+
+HIGH_LATENCY_FS_ENV_VAR = "SET_PACKAGE_ATTRIBUTE_HIGH_LATENCY_FS"
+
+# Filesystem types, as in `/proc/mounts`, where each directory lookup is a network
+# round trip.  All the `fuse.*` types are also included.
+_high_latency_fs_types = frozenset(["nfs", "nfs4", "cifs", "smb3", "smbfs", "ncpfs",
+                                    "afs", "9p", "ceph", "glusterfs", "lustre", "gpfs",
+                                    "beegfs", "davfs", "sshfs", "fuse"])
+
+# Directories with fewer levels than this are never treated as high-latency, since
+# checking their few ancestor directories concurrently would save little.
+_MIN_HIGH_LATENCY_DEPTH = 4
+
+_mount_table = None # The `(mount_point, fs_type)` pairs in `/proc/mounts`, once read.
+
+def _get_mount_table():
+    """Return a list of the `(mount_point, fs_type)` pairs in `/proc/mounts`, which
+    is only read once per process.  The list is empty if it cannot be read."""
+    global _mount_table
+    if _mount_table is None:
+        mount_table = []
+        try:
+            with open("/proc/mounts") as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 3:
+                        mount_table.append((_unescape_mount_point(fields[1]),
+                                            fields[2]))
+        except (IOError, OSError):
+            pass
+        _mount_table = mount_table
+    return _mount_table
+
+def _unescape_mount_point(mount_point):
+    """Decode the octal escapes which `/proc/mounts` uses for spaces and some other
+    characters in mount points."""
+    if "\\" not in mount_point:
+        return mount_point
+    import re # Only imported when needed.
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), mount_point)
+
+def _on_high_latency_fs(dirname):
+    """Return true if the directory `dirname` should be treated as being on a
+    high-latency filesystem.  The environment variable named by
+    `HIGH_LATENCY_FS_ENV_VAR` decides if it is set to a non-empty value, where
+    `"0"`, `"false"` and `"no"` mean false.  Otherwise shallow directories are
+    not, and for others the type of the mount containing `dirname` is looked up
+    in `/proc/mounts`, where available."""
+    env_value = os.environ.get(HIGH_LATENCY_FS_ENV_VAR, "").strip().lower()
+    if env_value:
+        return env_value not in ("0", "false", "no")
+    if dirname.rstrip(os.sep).count(os.sep) < _MIN_HIGH_LATENCY_DEPTH:
+        return False
+    best_mount_point, best_fs_type = "", ""
+    for mount_point, fs_type in _get_mount_table():
+        if ((dirname + os.sep).startswith(mount_point.rstrip(os.sep) + os.sep)
+                and len(mount_point) >= len(best_mount_point)):
+            best_mount_point, best_fs_type = mount_point, fs_type
+    return (best_fs_type in _high_latency_fs_types
+            or best_fs_type.split(".")[0] == "fuse")
+
+def _find_package_dirs_concurrently(script_dirname, max_workers=8):
+    """Like `_find_package_dirs`, but all the ancestor directories of
+    `script_dirname` are checked for `__init__` files concurrently, in a small
+    thread pool.  On high-latency filesystems this makes the time taken about
+    the same regardless of the depth of the directory.  Where there is no
+    `concurrent.futures` module the directories are checked one at a time."""
+    try:
+        from concurrent.futures import ThreadPoolExecutor # Only imported when needed.
+    except ImportError: # Python 2.
+        return _find_package_dirs(script_dirname)
+    ancestors = [script_dirname]
+    while os.path.dirname(ancestors[-1]) != ancestors[-1]:
+        ancestors.append(os.path.dirname(ancestors[-1]))
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(ancestors))) as executor:
+        is_package = list(executor.map(_is_package_dir, ancestors))
+
+    # The package directories are the contiguous run starting at script_dirname.
+    num_levels = is_package.index(False) if False in is_package else len(ancestors) - 1
+    package_parts = tuple(os.path.basename(dirname)
+                          for dirname in reversed(ancestors[:num_levels]))
+    return ancestors[num_levels], package_parts
+
+def _find_package_dirs(script_dirname, dir_cache=None):
+    """Go up the directory tree from `script_dirname`, looking for `__init__` files,
+    to find the top-level package directory.  Return a tuple
+    `(dirname, package_parts)` where `dirname` is the directory containing the
+    top-level package directory and `package_parts` is a tuple of the package
+    name parts, outermost first.  The tuple is empty if
+    `script_dirname` is not a package directory.
+
+    If `dir_cache` is a dict then results are memoized in it for every directory
+    passed on the way up, so resolving many files which share ancestor directories
+    only examines each directory once."""
+    visited = [] # The package directories passed on the way up, innermost first.
+    dirname = script_dirname
+    while True:
+        if dir_cache is not None and dirname in dir_cache:
+            root_dirname, package_parts = dir_cache[dirname]
+            break
+        if not _is_package_dir(dirname):
+            root_dirname, package_parts = dirname, ()
+            if dir_cache is not None:
+                dir_cache[dirname] = (root_dirname, package_parts)
+            break
+        visited.append(dirname)
+        dirname = os.path.dirname(dirname)
+
+    for dirname in reversed(visited):
+        package_parts += (os.path.basename(dirname),)
+        if dir_cache is not None:
+            dir_cache[dirname] = (root_dirname, package_parts)
+    return root_dirname, package_parts
+
+def _normalize_path(path, resolve_symlinks=True):
+    """Return the absolute path of `path`, with symlinks resolved if
+    `resolve_symlinks` is true."""
+    path = os.path.abspath(path)
+    return os.path.realpath(path) if resolve_symlinks else path
+
+_root_index = None # The cached set of normalized root directory paths.
+_root_index_key = None # The `sys.path` entries, extra roots, and symlink setting.
+
+def _get_root_index(roots=None, resolve_symlinks=True):
+    """Return a frozenset of the normalized paths of the `sys.path` entries,
+    together with those of any extra root directories in `roots`.  The set is
+    cached and reused until `sys.path` or the arguments change."""
+    global _root_index, _root_index_key
+    key = (tuple(sys.path), tuple(roots or ()), resolve_symlinks)
+    if key != _root_index_key:
+        _root_index = frozenset(_normalize_path(path, resolve_symlinks)
+                                for path in key[0] + key[1])
+        _root_index_key = key
+    return _root_index
 
-def _set_package_attribute(modify_syspath):
+def _find_namespace_package_dirs(script_dirname, roots=None, resolve_symlinks=True):
+    """Find the package of the directory `script_dirname` assuming that every
+    directory below a root directory is a package, as with implicit namespace
+    packages (PEP 420).  The root directories are the `sys.path` entries and any
+    extra directories in `roots`.  The closest root which is a strict ancestor of
+    `script_dirname` is used, found in a single pass up the directory tree.  The
+    return value is the same as for `_find_package_dirs`."""
+    root_index = _get_root_index(roots, resolve_symlinks)
+    reversed_parts = [] # A reversed list of package name parts, to build up.
+    dirname = script_dirname
+    while True:
+        parent_dirname, name = os.path.split(dirname)
+        if parent_dirname == dirname: # Reached the filesystem root.
+            return script_dirname, ()
+        reversed_parts.append(name)
+        if parent_dirname in root_index:
+            return parent_dirname, tuple(reversed(reversed_parts))
+        dirname = parent_dirname
+
+def _resolve_module_file(module_file, dir_cache=None, namespace_packages=False,
+                         roots=None, high_latency_fs=False, resolve_symlinks=True):
+    """Return a tuple `(dirname, full_subpackage_name, module_name)` for the module
+    file `module_file`.  Here `dirname` is the directory containing the top-level
+    package directory and `full_subpackage_name` is the name of the subpackage the
+    module is in.  The latter is the empty string if the file is not inside a
+    package.
+
+    If `high_latency_fs` is true then the directories are checked concurrently.
+    If it is `None` then that is done only if the file's directory is on a
+    high-latency filesystem.  If `resolve_symlinks` is false then the package is
+    found in the logical path space of `module_file`, without resolving any
+    symlinks in it."""
+    script_dirname, script_filename = os.path.split(
+                           _normalize_path(module_file, resolve_symlinks))
+    module_name = os.path.splitext(script_filename)[0]
+    if namespace_packages:
+        dirname, package_parts = _find_namespace_package_dirs(script_dirname, roots,
+                                                              resolve_symlinks)
+    elif high_latency_fs or (high_latency_fs is None
+                             and _on_high_latency_fs(script_dirname)):
+        dirname, package_parts = _find_package_dirs_concurrently(script_dirname)
+    else:
+        dirname, package_parts = _find_package_dirs(script_dirname, dir_cache)
+    return dirname, ".".join(package_parts), module_name
+
+def _import_subpackages(dirname, full_subpackage_names):
+    """Import the subpackages in the list `full_subpackage_names`, all of which must
+    have their top-level package directory in the directory `dirname`."""
+    # Normally you insert to sys.path as position one, leaving the script's
+    # directory in position zero.  Here, though, it is temporary and we want
+    # to avoid name shadowing so we insert at position zero.
+    sys.path.insert(0, dirname)
+    try:
+        for full_subpackage_name in full_subpackage_names:
+            __import__(full_subpackage_name)
+    finally:
+        del sys.path[0] # Remove the added path; no longer needed.
+
+import_memory_report = None # Set to an `ImportMemoryReport` when memory is traced.
+_TRACE_MEMORY_FRAMES = 128 # Deep enough to reach the module frames of nested imports.
+
+class ImportMemoryReport(object):
+    """The memory allocated while `init` imported the package of the script,
+    attributed to the modules which were newly imported.  Each allocation is
+    counted against the innermost module which was being found or loaded when it
+    was made, including the memory the import system allocates for the module
+    itself, or against `"<other>"` if no module was being found or loaded.
+
+    The attribute `module_sizes` is a dict mapping module names to the number of
+    bytes attributed to them, and `total` is the total number of bytes."""
+
+    def __init__(self, module_sizes):
+        self.module_sizes = module_sizes
+        self.total = sum(module_sizes.values())
+
+    def top(self, limit=10):
+        """Return a list of the `limit` largest `(module_name, size)` pairs, largest
+        first."""
+        return sorted(self.module_sizes.items(), key=lambda item: (-item[1], item[0])
+                      )[:limit]
+
+    def package_size(self, package_name):
+        """Return the number of bytes attributed to the package or module
+        `package_name` together with all its submodules."""
+        prefix = package_name + "."
+        return sum(size for name, size in self.module_sizes.items()
+                   if name == package_name or name.startswith(prefix))
+
+    def over_budget(self, budgets):
+        """Return a list of `(package_name, size, budget)` tuples for the packages in
+        the dict `budgets`, mapping package names to sizes in bytes, whose memory
+        size is over their budget."""
+        overruns = []
+        for package_name, budget in sorted(budgets.items()):
+            size = self.package_size(package_name)
+            if size > budget:
+                overruns.append((package_name, size, budget))
+        return overruns
+
+    def format(self, limit=10):
+        """Return a printable string of the report, showing the `limit` largest
+        modules."""
+        lines = ["Memory allocated by importing the package in"
+                 " set_package_attribute.init:"]
+        for name, size in self.top(limit):
+            lines.append("  {0:>12,d} B  {1}".format(size, name))
+        lines.append("  {0:>12,d} B  total over {1} modules".format(
+                                                    self.total, len(self.module_sizes)))
+        return "\n".join(lines)
+
+_IMPORT_FRAME_PREFIX = "<set_package_attribute import "
+
+def _make_import_trampoline(module_name):
+    """Return a function which just calls its first argument on the remaining ones,
+    but whose code has a filename naming the module `module_name`.  Its frame
+    then marks, in `tracemalloc` tracebacks, the allocations made while that
+    module is being loaded."""
+    namespace = {}
+    exec(compile("def trampoline(function, *args):\n    return function(*args)\n",
+                 _IMPORT_FRAME_PREFIX + module_name + ">", "exec"), namespace)
+    return namespace["trampoline"]
+
+class _MemoryTracingLoader(object):
+    """A loader wrapping `loader` so that the module is created and executed
+    inside the frame of the import trampoline `trampoline`.  The original loader
+    is put back on the module after it is executed."""
+
+    def __init__(self, loader, trampoline):
+        self.loader = loader
+        self.trampoline = trampoline
+
+    def create_module(self, spec):
+        return self.trampoline(self.loader.create_module, spec)
+
+    def exec_module(self, module):
+        try:
+            self.trampoline(self.loader.exec_module, module)
+        finally:
+            module.__loader__ = self.loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self.loader
+
+    def __getattr__(self, attr):
+        return getattr(self.loader, attr)
+
+class _MemoryTracingFinder(object):
+    """A meta path finder which finds specs using the other finders on
+    `sys.meta_path`, inside an import trampoline frame, and wraps their loaders
+    with `_MemoryTracingLoader`."""
+
+    def find_spec(self, name, path=None, target=None):
+        trampoline = _make_import_trampoline(name)
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = trampoline(finder.find_spec, name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if hasattr(spec.loader, "exec_module"):
+            spec.loader = _MemoryTracingLoader(spec.loader, trampoline)
+        return spec
+
+def _trace_import_memory(import_function, *args):
+    """Call `import_function(*args)` while tracing memory allocations with
+    `tracemalloc`, and return an `ImportMemoryReport` for the modules it imported.
+    If tracing was already started it is left running, otherwise it is stopped
+    again afterward."""
+    import tracemalloc # Only imported when needed.
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(_TRACE_MEMORY_FRAMES)
+    finder = _MemoryTracingFinder()
+    snapshot_before = tracemalloc.take_snapshot()
+    sys.meta_path.insert(0, finder)
+    try:
+        import_function(*args)
+    finally:
+        sys.meta_path.remove(finder)
+        snapshot_after = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+
+    # Leave out the allocations made by this module itself, such as the trampolines.
+    own_allocations = [tracemalloc.Filter(False, __file__)]
+    snapshot_before = snapshot_before.filter_traces(own_allocations)
+    snapshot_after = snapshot_after.filter_traces(own_allocations)
+
+    module_sizes = {}
+    for stat in snapshot_after.compare_to(snapshot_before, "traceback"):
+        if stat.size_diff <= 0:
+            continue
+        frames = list(stat.traceback)
+        if sys.version_info >= (3, 7): # Frames became sorted oldest first in 3.7.
+            frames.reverse()
+        owner = "<other>"
+        for frame in frames:
+            if frame.filename.startswith(_IMPORT_FRAME_PREFIX):
+                owner = frame.filename[len(_IMPORT_FRAME_PREFIX):-1]
+                break
+        module_sizes[owner] = module_sizes.get(owner, 0) + stat.size_diff
+    return ImportMemoryReport(module_sizes)
+
+def _print_import_memory_report():
+    """Print the import memory report to `sys.stderr`; registered with `atexit`."""
+    if import_memory_report is not None:
+        print(import_memory_report.format(), file=sys.stderr)
+
+def _set_package_attribute(modify_syspath, namespace_packages=False, roots=None,
+                           trace_memory=False, print_memory_report=False,
+                           memory_budgets=None, pickle_by_qualified_name=False,
+                           background=False, syspath_profile=None,
+                           prefer_installed=False, high_latency_fs=None,
+                           resolve_symlinks=True):
     """Set the `__package__` attribute of the module `__main__` if it is not
     already set."""
     # Get the module named __main__ from sys.modules.
@@ -196,45 +697,604 @@ def _set_package_attribute(modify_syspath):
     # Do nothing unless the program was started from a script and no __package__ is set.
     if main_found and main_module.__package__ is None:
 
-        importing_file = main_module.__file__
-        script_dirname, script_filename = os.path.split(
-                               os.path.realpath(os.path.abspath(importing_file)))
-        script_module_name = os.path.splitext(script_filename)[0]
-        parent_dirs = [] # A reversed list of package name parts, to build up.
-
-        # Go up the directory tree to find the top-level package directory.
-        dirname = script_dirname
-        while os.path.exists(os.path.join(dirname, "__init__.py")):
-            dirname, name = os.path.split(dirname)
-            parent_dirs.append(name)
+        dirname, full_subpackage_name, script_module_name = _resolve_module_file(
+                main_module.__file__, namespace_packages=namespace_packages,
+                roots=roots, high_latency_fs=high_latency_fs,
+                resolve_symlinks=resolve_symlinks)
 
-        if parent_dirs: # Does nothing if no __init__.py file was found.
+        if full_subpackage_name: # Does nothing if no __init__ file was found.
             #assert os.path.abspath(sys.path[0]) == script_dirname # True
             if modify_syspath:
                 _delete_sys_path_0()
+            if syspath_profile:
+                _reorder_sys_path(_load_sys_path_profile(syspath_profile), dirname)
+                atexit.register(_save_sys_path_profile, syspath_profile)
+            if prefer_installed:
+                dirname = _choose_package_copy(full_subpackage_name, dirname,
+                                               namespace_packages)
 
-            # Build the name of the subpackage the "__main__" module is in, and set
-            # the __package__ variable to it.
+            # Set the __package__ variable to the name of the subpackage the "__main__"
+            # module is in.
             # Note: the subpackage name does not include the name of the module itself.
-            full_subpackage_name = ".".join(reversed(parent_dirs))
             main_module.__package__ = full_subpackage_name
 
-            # Now do the actual import of the subpackage.
-            # Note: the script's module loads and initializes *twice* if you import
-            # full_module_name rather than subpackage_module!
+            full_module_name = full_subpackage_name + "." + script_module_name
+            if trace_memory:
+                try:
+                    import tracemalloc
+                except ImportError: # Python 2.
+                    import warnings
+                    warnings.warn("The tracemalloc module is not available, so memory"
+                                  " is not being traced.", RuntimeWarning)
+                    trace_memory = False
 
-            # Normally you insert to sys.path as position one, leaving the script's
-            # directory in position zero.  Here, though, it is temporary and we want
-            # to avoid name shadowing so we insert at position zero.
-            sys.path.insert(0, dirname)
-            subpackage_module = __import__(full_subpackage_name)
-            del sys.path[0] # Remove the added path; no longer needed.
+            if background and not trace_memory and PathFinder is not None:
+                # The script's module is registered first, since the script may
+                # import itself by its full name before the background import ends.
+                sys.modules[full_module_name] = main_module
+                _start_background_import(dirname, full_subpackage_name)
+            else:
+                # Now do the actual import of the subpackage.
+                # Note: the script's module loads and initializes *twice* if you import
+                # full_module_name rather than subpackage_module!
+                if trace_memory:
+                    _trace_memory_of_import(dirname, full_subpackage_name,
+                                            print_memory_report, memory_budgets)
+                else:
+                    _import_subpackages(dirname, [full_subpackage_name])
 
-            #assert full_subpackage_name in sys.modules # True
-            full_module_name = full_subpackage_name + "." + script_module_name
-            #assert full_module_name not in sys.modules # True
-            sys.modules[full_module_name] = main_module
-            #assert full_module_name in sys.modules # True
+                #assert full_subpackage_name in sys.modules # True
+                #assert full_module_name not in sys.modules # True
+                sys.modules[full_module_name] = main_module
+                #assert full_module_name in sys.modules # True
+
+            if pickle_by_qualified_name:
+                _set_main_spec(main_module, full_module_name, dirname, resolve_symlinks)
+                qualify_main_names()
+
+            if not resolve_symlinks:
+                atexit.register(_warn_about_aliased_modules)
+
+def find_aliased_modules():
+    """Return a list of the groups of names in `sys.modules` which are different
+    module objects loaded from the same file, such as a module loaded both through
+    a symlinked path and through its real path, or under two different names.
+    Each group is a sorted list of module names."""
+    modules_by_file = {}
+    for name, module in list(sys.modules.items()):
+        try: # Read the namespace directly, so that lazy modules are not loaded.
+            module_file = object.__getattribute__(module, "__dict__").get("__file__")
+        except AttributeError:
+            continue
+        if module_file:
+            modules = modules_by_file.setdefault(os.path.realpath(module_file), {})
+            modules.setdefault(id(module), []).append(name)
+    return sorted(sorted(name for names in modules.values() for name in names)
+                  for modules in modules_by_file.values() if len(modules) > 1)
+
+def _warn_about_aliased_modules():
+    """Warn about any aliased modules; registered with `atexit` by
+    `init(resolve_symlinks=False)`."""
+    import warnings
+    for names in find_aliased_modules():
+        warnings.warn("The same file was loaded as separate modules {0}.".format(
+                      ", ".join(names)), RuntimeWarning)
+
+def _preload_and_freeze(preload):
+    """Wait for any background import, import the modules named in `preload`, and
+    then move all the objects tracked by the garbage collector to its permanent
+    generation.  Relative names in `preload` are resolved against the package of
+    `__main__`."""
+    wait_for_background_init()
+    main_module = sys.modules.get("__main__")
+    package = getattr(main_module, "__package__", None) or None
+    for name in preload:
+        import_module(name, package)
+    if hasattr(gc, "freeze"): # Python 3.7 and later.
+        gc.freeze()
+
+def forked_memory_report(pids=None):
+    """Return a dict mapping the ids of the processes in `pids` to tuples
+    `(shared, private)` giving the number of bytes of their resident memory which
+    is shared with other processes and private to them.  For children forked
+    after `init(prefork=True)` most of the memory used by the package should be
+    shared.  If `pids` is `None` then the child processes of the current process
+    are used.
+
+    This reads the `/proc` filesystem, so it only works on Linux.  Processes which
+    cannot be read are left out of the returned dict."""
+    if pids is None:
+        pids = []
+        try:
+            for task in os.listdir("/proc/self/task"):
+                with open("/proc/self/task/{0}/children".format(task)) as f:
+                    pids.extend(int(pid) for pid in f.read().split())
+        except (IOError, OSError):
+            pass
+    report = {}
+    for pid in pids:
+        sizes = {}
+        try:
+            with open("/proc/{0}/smaps_rollup".format(pid)) as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) == 3 and fields[2] == "kB":
+                        field = fields[0].rstrip(":")
+                        sizes[field] = sizes.get(field, 0) + int(fields[1]) * 1024
+        except (IOError, OSError, ValueError):
+            continue
+        report[pid] = (sizes.get("Shared_Clean", 0) + sizes.get("Shared_Dirty", 0),
+                       sizes.get("Private_Clean", 0) + sizes.get("Private_Dirty", 0))
+    return report
+
+package_copy_report = None # Set by `init(prefer_installed=True)`.
+
+def _choose_package_copy(full_subpackage_name, dirname, namespace_packages=False):
+    """Look on `sys.path`, outside of the source tree in `dirname`, for an installed
+    copy of the package which contains the subpackage `full_subpackage_name`.
+    Return the `sys.path` entry containing the first such copy, or `dirname` if
+    there is none.  Either way `package_copy_report` is set to describe the
+    choice."""
+    global package_copy_report
+    package_parts = full_subpackage_name.split(".")
+    dirname_realpath = os.path.realpath(dirname)
+    tree_realpath = os.path.join(dirname_realpath, package_parts[0])
+    is_package_dir = os.path.isdir if namespace_packages else _is_package_dir
+
+    for entry in sys.path:
+        entry_realpath = os.path.realpath(os.path.abspath(entry))
+        if (entry_realpath == dirname_realpath
+                or (entry_realpath + os.sep).startswith(tree_realpath + os.sep)):
+            continue # Part of the source tree, e.g., the script's directory.
+        if all(is_package_dir(os.path.join(entry_realpath, *package_parts[:level]))
+               for level in range(1, len(package_parts) + 1)):
+            entry = os.path.abspath(entry)
+            package_copy_report = ("Using the installed copy of package {0!r} in {1},"
+                                   " not the source tree copy in {2}.".format(
+                                       package_parts[0], entry, dirname))
+            return entry
+    package_copy_report = ("No installed copy of package {0!r} was found on sys.path,"
+                           " so the source tree copy in {1} is used.".format(
+                               package_parts[0], dirname))
+    return dirname
+
+def _load_sys_path_profile(profile_file):
+    """Load a `sys.path` profile, a dict mapping the realpaths of `sys.path` entries
+    to the number of top-level modules they have served.  An empty dict is
+    returned if the file does not exist or cannot be read, and entries which are
+    not a string mapped to an integer are dropped."""
+    import json # Only imported when needed.
+    try:
+        with open(profile_file) as f:
+            hits = json.load(f)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(hits, dict):
+        return {}
+    string_types = (str, type(u"")) # Keys are unicode on Python 2.
+    int_types = (int, type(2**64)) # Large counts are longs on Python 2.
+    return dict((path, count) for path, count in hits.items()
+                if isinstance(path, string_types) and isinstance(count, int_types)
+                and not isinstance(count, bool))
+
+def _save_sys_path_profile(profile_file):
+    """Add the `sys.path` entries which served the top-level modules in
+    `sys.modules` to the profile in `profile_file`; registered with `atexit`.
+    Submodules are not counted, since they are found through the `__path__` of
+    their package rather than through `sys.path`."""
+    import json
+    hits = _load_sys_path_profile(profile_file)
+    entries = set(os.path.realpath(os.path.abspath(path)) for path in sys.path)
+    for name, module in list(sys.modules.items()):
+        if "." in name:
+            continue
+        location = _module_location(module)
+        if location in entries:
+            hits[location] = hits.get(location, 0) + 1
+    temp_file = "{0}.{1}.tmp".format(profile_file, os.getpid())
+    try:
+        with open(temp_file, "w") as f:
+            json.dump(hits, f, indent=1, sort_keys=True)
+        # Python 2 has no os.replace.
+        getattr(os, "replace", os.rename)(temp_file, profile_file)
+    except (IOError, OSError):
+        pass # The profile is only an optimization.
+
+def _module_location(module):
+    """Return the realpath of the directory a module was loaded from, i.e., the
+    `sys.path` entry which served it, or `None` if it was not loaded from a
+    directory."""
+    module_file = getattr(module, "__file__", None)
+    if module_file:
+        location = os.path.dirname(os.path.abspath(module_file))
+        if os.path.basename(module_file).startswith("__init__."):
+            location = os.path.dirname(location)
+    else: # Namespace packages have a __path__ but no __file__.
+        module_path = list(getattr(module, "__path__", None) or [])
+        if not module_path:
+            return None
+        location = os.path.dirname(os.path.abspath(module_path[0]))
+    return os.path.realpath(location)
+
+def _is_identifier(name):
+    """Return true if `name` is a valid Python identifier, i.e., importable."""
+    try:
+        return name.isidentifier()
+    except AttributeError: # Python 2.
+        return bool(name) and not name[0].isdigit() and name.replace("_", "a").isalnum()
+
+def _cached_filenames(path_entry):
+    """Return the set of filenames in the `sys.path` entry `path_entry` which the
+    import system has already read and cached in its finder for the entry, or
+    `None` if there is no such listing."""
+    finder = sys.path_importer_cache.get(path_entry or os.getcwd())
+    if getattr(finder, "_path_mtime", -1) == -1: # Not a listed FileFinder.
+        return None
+    return getattr(finder, "_path_cache", None)
+
+def _top_level_names(path_entry):
+    """Return the set of top-level module and package names which the `sys.path`
+    entry `path_entry` could provide, or `None` if they cannot be listed (such as
+    for a zip file), in which case the entry might provide any name.  The listing
+    cached by the import system is used if there is one."""
+    filenames = _cached_filenames(path_entry)
+    if filenames is None:
+        try:
+            filenames = os.listdir(path_entry or os.curdir)
+        except OSError:
+            return set() if not os.path.exists(path_entry or os.curdir) else None
+    names = set(filename.split(".", 1)[0] for filename in filenames)
+    names.discard("__pycache__") # Bytecode caches, found in almost every directory.
+    return set(name for name in names if _is_identifier(name))
+
+def _reorder_sys_path(hits, first_dirname=None):
+    """Reorder `sys.path` in place, putting the directory `first_dirname` (if it is
+    on `sys.path`) and then the entries with the most hits in the profile `hits`
+    first.  An entry is never moved in front of an earlier entry which could
+    provide any of the same top-level names, so the entry which serves any
+    particular import never changes and no new name shadowing can occur.
+
+    Only the entries which are to be moved and the earlier entries they are
+    checked against are ever listed, each at most once."""
+    path = list(sys.path)
+    num_entries = len(path)
+    realpaths = [os.path.realpath(os.path.abspath(entry)) for entry in path]
+    first_realpath = first_dirname and os.path.realpath(first_dirname)
+    names_cache = {}
+
+    def names(i):
+        if i not in names_cache:
+            names_cache[i] = _top_level_names(path[i])
+        return names_cache[i]
+
+    def conflicts(i, j):
+        return names(i) is None or names(j) is None or not names(i).isdisjoint(names(j))
+
+    def priority(i):
+        return (realpaths[i] != first_realpath, -hits.get(realpaths[i], 0), i)
+
+    # Repeatedly take the best entry which no remaining earlier entry conflicts
+    # with.  That is either the first remaining entry or one of those to be moved.
+    to_move = sorted((i for i in range(num_entries)
+                      if realpaths[i] == first_realpath or hits.get(realpaths[i])),
+                     key=priority)
+    blockers = {} # The earliest remaining entry each entry to move conflicts with.
+    placed = set()
+    new_order = []
+    first_remaining = 0
+    while len(new_order) < num_entries:
+        while first_remaining in placed:
+            first_remaining += 1
+        best = first_remaining
+        for i in to_move:
+            if priority(i) >= priority(first_remaining):
+                break
+            if i in placed:
+                continue
+            # The entries before the previous blocker are known not to conflict.
+            j = max(blockers.get(i, first_remaining), first_remaining)
+            while j < i and (j in placed or not conflicts(j, i)):
+                j += 1
+            blockers[i] = j
+            if j == i:
+                best = i
+                break
+        placed.add(best)
+        new_order.append(best)
+    sys.path[:] = [path[i] for i in new_order]
+
+_background_thread = None # The thread running the background import, if any.
+_background_finder = None # The finder used by the background import.
+_background_exc_info = None # The exception info if the background import failed.
+_background_import_hook = None # The `_WaitingImport` hook, while it is installed.
+
+class _PackageRootFinder(object):
+    """A meta path finder which finds only the top-level package `package_name`, in
+    the directory `dirname`.  This makes the package importable without adding
+    `dirname` to `sys.path`, which other threads may be using at the same time."""
+
+    def __init__(self, package_name, dirname):
+        self.package_name = package_name
+        self.dirname = dirname
+
+    def find_spec(self, name, path=None, target=None):
+        if name != self.package_name:
+            return None
+        return PathFinder.find_spec(name, [self.dirname])
+
+class _WaitingImport(object):
+    """A replacement for `__import__`, installed during a background import, which
+    makes any import from the package `package_name` by a thread other than the
+    worker thread first wait for the whole background import to finish.  The
+    import system takes the lock for a module before it imports the module's
+    parent packages, so letting the threads import modules of the same package
+    concurrently can deadlock them."""
+
+    def __init__(self, original_import, package_name, worker_thread, current_thread):
+        self.original_import = original_import
+        self.package_name = package_name
+        self.worker_thread = worker_thread
+        self.current_thread = current_thread # The `threading` function.
+
+    def __call__(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level > 0: # Relative imports stay inside the importing module's package.
+            top_name = ((globals or {}).get("__package__") or "").split(".")[0]
+        else:
+            top_name = name.split(".")[0]
+        if (top_name == self.package_name and _background_thread is not None
+                and self.current_thread() is not self.worker_thread):
+            wait_for_background_init()
+        return self.original_import(name, globals, locals, fromlist, level)
+
+def _start_background_import(dirname, full_subpackage_name):
+    """Start importing the subpackage `full_subpackage_name`, whose top-level
+    package directory is in `dirname`, on a worker thread."""
+    global _background_thread, _background_finder, _background_import_hook
+    import threading # Only imported when needed.
+    try:
+        import builtins
+    except ImportError: # Python 2.
+        import __builtin__ as builtins
+    package_name = full_subpackage_name.split(".")[0]
+    _background_finder = _PackageRootFinder(package_name, dirname)
+    sys.meta_path.insert(0, _background_finder)
+    background_thread = threading.Thread(target=_background_import,
+                                         args=(full_subpackage_name,),
+                                         name="set_package_attribute")
+    background_thread.start()
+    # Only install the hook once the thread is started, so that it can be joined.
+    _background_thread = background_thread
+    _background_import_hook = _WaitingImport(builtins.__import__, package_name,
+                                             background_thread,
+                                             threading.current_thread)
+    builtins.__import__ = _background_import_hook
+    atexit.register(_report_background_import_failure)
+
+def _background_import(full_subpackage_name):
+    """Import the subpackage, saving any exception to re-raise in the main thread."""
+    global _background_exc_info
+    try:
+        import_module(full_subpackage_name)
+    except BaseException:
+        _background_exc_info = sys.exc_info()
+
+def wait_for_background_init():
+    """Block until the package import started by `init(background=True)` has
+    finished, and re-raise any exception it raised.  Nothing is done if there is no
+    background import.  It is not usually necessary to call this, since the first
+    import from the package by the script, or by any other thread, already waits
+    for the background import and re-raises its exception."""
+    global _background_thread, _background_finder, _background_exc_info
+    global _background_import_hook
+    background_thread = _background_thread
+    if background_thread is None:
+        return
+    background_thread.join()
+    if _background_thread is not background_thread: # Another thread finished up.
+        return
+    _background_thread = None
+    if _background_finder in sys.meta_path:
+        sys.meta_path.remove(_background_finder)
+    _background_finder = None
+    try:
+        import builtins
+    except ImportError: # Python 2.
+        import __builtin__ as builtins
+    if builtins.__import__ is _background_import_hook:
+        builtins.__import__ = _background_import_hook.original_import
+    _background_import_hook = None
+    if _background_exc_info is not None:
+        exc_info, _background_exc_info = _background_exc_info, None
+        raise exc_info[1]
+
+def _report_background_import_failure():
+    """Warn about a failed background import which was never waited for, so that
+    its exception was never raised; registered with `atexit`."""
+    try:
+        wait_for_background_init()
+    except Exception as e:
+        import warnings
+        warnings.warn("The background import of the package by"
+                      " set_package_attribute.init failed: {0!r}".format(e),
+                      RuntimeWarning)
+
+def lazy_import(name, package=None):
+    """Return the module `name`, but defer loading it until one of its attributes is
+    first accessed.  Relative names like `".heavy_module"` are resolved against
+    `package`, which defaults to the `__package__` of the calling module.  That is
+    the package set by `init` when the caller is run as a script, and its usual
+    package when it is imported normally, so the same code works both ways::
+
+       heavy_module = set_package_attribute.lazy_import(".heavy_module")
+
+    The parent packages of the module are still imported right away.  If the
+    module is already in `sys.modules` then it is simply returned.  Where
+    `importlib.util.LazyLoader` is not available the module is imported
+    immediately."""
+    if package is None:
+        package = sys._getframe(1).f_globals.get("__package__")
+    try:
+        from importlib.util import LazyLoader, find_spec, module_from_spec, resolve_name
+    except ImportError: # Python 2 and early Python 3.
+        return import_module(name, package)
+    if name.startswith("."):
+        if not package:
+            raise ImportError("Cannot lazily import {0!r}: the calling module has no"
+                              " package.".format(name))
+        name = resolve_name(name, package)
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = find_spec(name) # Imports the parent packages.
+    if spec is None:
+        raise ImportError("No module named {0!r}".format(name))
+    spec.loader = LazyLoader(spec.loader)
+    module = module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    parent_name, _, child_name = name.rpartition(".")
+    if parent_name:
+        setattr(sys.modules[parent_name], child_name, module)
+    return module
+
+_spawned_main_dirname = None # The directory spawned workers import `__main__` from.
+_worker_start_path = None # The `sys.path` of spawned workers, apart from their cwd.
+
+def _set_main_spec(main_module, full_module_name, dirname, resolve_symlinks=True):
+    """Give `main_module` a spec under its full package-qualified name, and arrange
+    for spawned `multiprocessing` workers to import the module under that name,
+    from the directory `dirname` containing the top-level package."""
+    global _spawned_main_dirname, _worker_start_path
+    try:
+        from importlib.util import spec_from_file_location
+    except ImportError: # Python 2.
+        return
+    main_module.__spec__ = spec_from_file_location(full_module_name,
+                                _normalize_path(main_module.__file__, resolve_symlinks))
+    _spawned_main_dirname = dirname
+    # Spawned workers start with the same sys.path as this process did, except
+    # that the script's directory is replaced by their current directory.
+    script_dirname = os.path.dirname(os.path.abspath(main_module.__file__))
+    _worker_start_path = [entry for entry in sys.path
+                          if os.path.abspath(entry or os.curdir) != script_dirname]
+    _patch_spawn_preparation_data()
+
+class _SpawnedMainAlias(object):
+    """An extra entry in the preparation data which `multiprocessing` sends to a
+    spawned worker process.  Unpickling it in the worker calls
+    `_install_spawned_main_alias`, before the worker sets up its main module."""
+
+    def __init__(self, full_module_name):
+        self.full_module_name = full_module_name
+
+    def __reduce__(self):
+        return _install_spawned_main_alias, (self.full_module_name,)
+
+def _importable_by_spawned_workers():
+    """Return true if spawned workers can import this module before the `sys.path`
+    of this process has been applied to them, which is when they unpickle a
+    `_SpawnedMainAlias`.  That is not so if, for example, this module was copied
+    next to the script."""
+    worker_path = [os.getcwd()] + _worker_start_path
+    return PathFinder.find_spec(__name__, worker_path) is not None
+
+def _patch_spawn_preparation_data():
+    """Wrap `multiprocessing.spawn.get_preparation_data` so that, while `__main__`
+    is in `sys.modules` under its qualified spec name, spawned workers import the
+    module once under that name instead of running the script again as
+    `__mp_main__`.  If the workers could not import this module in order to do
+    that then they fall back to running the script as `__mp_main__`.  Either way
+    the directory containing the package is added to the workers' `sys.path`,
+    but not to that of this process."""
+    try:
+        from multiprocessing import spawn
+    except ImportError: # Python 2.
+        return
+    get_preparation_data = spawn.get_preparation_data
+    if getattr(get_preparation_data, "_set_package_attribute_wrapper", False):
+        return
+
+    def wrapped_get_preparation_data(name):
+        data = get_preparation_data(name)
+        main_name = data.get("init_main_from_name")
+        if main_name and sys.modules.get(main_name) is sys.modules["__main__"]:
+            if _importable_by_spawned_workers():
+                data["set_package_attribute_main"] = _SpawnedMainAlias(main_name)
+            if _spawned_main_dirname not in data["sys_path"]:
+                data["sys_path"].append(_spawned_main_dirname)
+        return data
+
+    wrapped_get_preparation_data._set_package_attribute_wrapper = True
+    spawn.get_preparation_data = wrapped_get_preparation_data
+
+def _install_spawned_main_alias(full_module_name):
+    """Make the `multiprocessing` worker process this is run in import the module
+    `full_module_name` and use it as both `__main__` and `__mp_main__`, rather
+    than running it as `__mp_main__` and then importing it again under its own
+    name to unpickle the objects which pickle by that name.  The module body then
+    runs only once in the worker, with `__name__` set to its full name."""
+    from multiprocessing import spawn
+    fixup_main_from_name = spawn._fixup_main_from_name
+
+    def import_main_from_name(mod_name):
+        if mod_name != full_module_name:
+            return fixup_main_from_name(mod_name)
+        spawn.old_main_modules.append(sys.modules["__main__"])
+        main_module = import_module(mod_name)
+        sys.modules["__main__"] = sys.modules["__mp_main__"] = main_module
+
+    spawn._fixup_main_from_name = import_main_from_name
+    return full_module_name
+
+def qualify_main_names():
+    """Rewrite the `__module__` attribute of the classes and functions defined in
+    the script `__main__`, including those nested in classes, to the script's full
+    package-qualified module name.  Objects defined by the script then pickle by
+    that name rather than as `__main__`, so unpickling them in another process
+    only imports the module instead of needing the script to be run.
+
+    This is done automatically by `init(pickle_by_qualified_name=True)`, but it
+    only sees the objects defined by then.  Call this function again after the
+    script has defined the rest of its classes and functions, for example at the
+    start of the `if __name__ == "__main__"` block.  Nothing is done unless
+    `__main__` is in `sys.modules` under its qualified spec name, as set by
+    `init`."""
+    main_module = sys.modules.get("__main__")
+    spec = getattr(main_module, "__spec__", None)
+    if spec is None or sys.modules.get(spec.name) is not main_module:
+        return
+    _qualify_names(list(vars(main_module).values()), spec.name, set())
+
+def _qualify_names(objects, module_name, seen_ids):
+    """Set the `__module__` of the classes and functions in `objects` which are
+    defined in `__main__` to `module_name`, recursing into classes."""
+    import types
+    for obj in objects:
+        obj = getattr(obj, "__func__", obj) # Unwrap staticmethod and classmethod.
+        if (not isinstance(obj, (type, types.FunctionType)) or id(obj) in seen_ids
+                or getattr(obj, "__module__", None) != "__main__"):
+            continue
+        seen_ids.add(id(obj))
+        obj.__module__ = module_name
+        if isinstance(obj, type):
+            _qualify_names(list(vars(obj).values()), module_name, seen_ids)
+
+def _trace_memory_of_import(dirname, full_subpackage_name, print_memory_report,
+                            memory_budgets):
+    """Import the subpackage while tracing its memory, set `import_memory_report`,
+    and warn about any packages which are over their budgets."""
+    global import_memory_report
+    import warnings
+    import_memory_report = _trace_import_memory(_import_subpackages, dirname,
+                                                [full_subpackage_name])
+    if print_memory_report:
+        atexit.register(_print_import_memory_report)
+    if memory_budgets:
+        for package_name, size, budget in import_memory_report.over_budget(
+                                                                  memory_budgets):
+            warnings.warn("Importing package {0!r} allocated {1:,d} bytes, over its"
+                          " budget of {2:,d} bytes.".format(package_name, size, budget),
+                          RuntimeWarning)
 
 deleted_sys_path_0_value = None
 
@@ -254,12 +1314,161 @@ def _restore_sys_path_0():
         sys.path.insert(0, deleted_sys_path_0_value)
         deleted_sys_path_0_value = None
 
-def init(modify_syspath=True):
+def init(modify_syspath=True, namespace_packages=False, roots=None,
+         trace_memory=False, print_memory_report=False, memory_budgets=None,
+         pickle_by_qualified_name=False, background=False, syspath_profile=None,
+         prefer_installed=False, high_latency_fs=None, prefork=False, preload=(),
+         resolve_symlinks=True):
     """Set the `__package__` attribute of the module `__main__` if it is not
     already set.
 
     If `modify_syspath` is true then whenever the `__package__` attribute is set
     the first element of `sys.path` (the current
-    directory of the script) is also deleted from the path list."""
-    _set_package_attribute(modify_syspath=modify_syspath)
+    directory of the script) is also deleted from the path list.
+
+    If `namespace_packages` is true then implicit namespace packages are allowed.
+    Instead of looking for `__init__` files the package is taken to start just
+    below the closest directory above the script which is on `sys.path` or in the
+    optional list of extra root directories `roots`.
+
+    If `trace_memory` is true then the memory allocated while importing the
+    package is traced with `tracemalloc` and attributed to the imported modules.
+    The resulting `ImportMemoryReport` is saved as
+    `set_package_attribute.import_memory_report`.  If `print_memory_report` is
+    also true then the report is printed to `sys.stderr` at exit.  The optional
+    dict `memory_budgets` maps package names to sizes in bytes, and a
+    `RuntimeWarning` is issued for each package which is over its budget.
+
+    If `pickle_by_qualified_name` is true then `__main__` is given a spec under
+    its full package-qualified name and the classes and functions it has defined
+    so far are made to pickle by that name; see `qualify_main_names`.
+
+    If `background` is true then `init` returns as soon as `__package__` is set,
+    and the package is imported on a worker thread while the script continues
+    with its own setup.  The first import from the package by the script blocks
+    until the worker thread has finished the whole import, and re-raises any
+    exception it raised; see `wait_for_background_init`.  This argument is
+    ignored if `trace_memory` is true.
+
+    If `syspath_profile` is the name of a file then the `sys.path` entries which
+    serve the top-level imports of each run are counted in that profile file at
+    exit.  On each run the directory containing the package (if it is on
+    `sys.path`) and then the most-used entries are moved to the front of
+    `sys.path`, without ever changing which entry a module is imported from.
+
+    If `prefer_installed` is true and a copy of the package which contains the
+    script's subpackage is installed on `sys.path`, such as from a wheel with
+    compiled extension modules, then that copy is imported rather than the one
+    in the source tree containing the script.  The choice made is described in
+    `set_package_attribute.package_copy_report`.
+
+    If `high_latency_fs` is true then all the directories above the script are
+    checked for `__init__` files concurrently rather than one at a time, which
+    is faster on network filesystems.  The default of `None` does this only if
+    the script is on a network or FUSE filesystem, or if the environment
+    variable `SET_PACKAGE_ATTRIBUTE_HIGH_LATENCY_FS` is set to a true value.
+
+    If `prefork` is true then `init` prepares the process to be forked by a
+    pre-forking server.  The garbage collector is disabled while the package and
+    then the modules named in `preload` are imported, where relative names are
+    relative to the script's package.  All the objects then tracked by the
+    garbage collector are frozen with `gc.freeze`, so that collections in the
+    forked children do not write to their memory pages.  This is also done for
+    a script which is not inside a package, although `preload` can then only
+    contain absolute names.  The previous state of the garbage collector is
+    restored afterward, even if an import fails.  See `forked_memory_report` to
+    check the memory shared by the children.
+
+    If `resolve_symlinks` is false then the package is found in the logical path
+    space of the script's `__file__`, without resolving symlinks in it, so that
+    it matches `sys.path` entries which go through symlinks such as a
+    `current -> releases/N` deployment link.  A `RuntimeWarning` is then issued
+    at exit if any file was loaded as two separate modules; see
+    `find_aliased_modules`."""
+    gc_was_enabled = gc.isenabled()
+    if prefork:
+        gc.disable() # Avoid leaving freed holes in the pages of the package.
+    try:
+        _set_package_attribute(modify_syspath=modify_syspath,
+                               namespace_packages=namespace_packages, roots=roots,
+                               trace_memory=trace_memory,
+                               print_memory_report=print_memory_report,
+                               memory_budgets=memory_budgets,
+                               pickle_by_qualified_name=pickle_by_qualified_name,
+                               background=background,
+                               syspath_profile=syspath_profile,
+                               prefer_installed=prefer_installed,
+                               high_latency_fs=high_latency_fs,
+                               resolve_symlinks=resolve_symlinks)
+        if prefork:
+            _preload_and_freeze(preload)
+    finally:
+        if prefork and gc_was_enabled:
+            gc.enable()
+
+
+def init_module(module, namespace_packages=False, roots=None, resolve_symlinks=True):
+    """Set the package context of an arbitrary module object, or of a module file
+    given by its pathname.  This is intended for plugin hosts and similar programs
+    which run files from inside packages with `exec` or `runpy.run_path`.
+
+    The subpackage containing the module is imported under its full name, just as
+    `init` does for `__main__`.  If `module` is a module object then its
+    `__package__` attribute is set (unless it is already set to something other
+    than `None`) and it is also added to `sys.modules` under its full
+    package-qualified name, unless that name is already taken.  No changes are
+    ever made to `sys.path[0]`.
+
+    The full package-qualified module name is returned, or `None` if the module
+    is not inside a package, already has its `__package__` set, or is a module
+    object with no `__file__` attribute yet.  For a pathname the returned name
+    can be passed as the `run_name` argument of `runpy.run_path`, which then
+    sets `__package__` for the code it runs.
+
+    The `namespace_packages`, `roots` and `resolve_symlinks` arguments are the
+    same as for `init`."""
+    return init_modules([module], namespace_packages=namespace_packages,
+                        roots=roots, resolve_symlinks=resolve_symlinks)[0]
+
+def init_modules(modules, namespace_packages=False, roots=None,
+                 resolve_symlinks=True):
+    """The batch version of `init_module`.  The argument `modules` is a sequence of
+    module objects and/or pathnames, and a list of the corresponding full
+    package-qualified module names (or `None` values) is returned.
+
+    The package directories of all the modules are resolved in one pass, sharing
+    the work for common ancestor directories.  The modules are then grouped by
+    the directory containing their top-level package, and the subpackages of each
+    group are imported with that directory put on `sys.path` only once."""
+    dir_cache = {}
+    resolved = []
+    groups = {} # Map each dirname to the list of subpackages to import from it.
+    for module in modules:
+        is_module_object = hasattr(module, "__package__") # Pathnames don't have it.
+        if not is_module_object:
+            module_file = module
+        elif module.__package__ is None and getattr(module, "__file__", None):
+            module_file = module.__file__
+        else: # The package is already set, or there is no file to find it from.
+            resolved.append(None)
+            continue
+        dirname, full_subpackage_name, module_name = _resolve_module_file(
+                module_file, dir_cache, namespace_packages=namespace_packages,
+                roots=roots, resolve_symlinks=resolve_symlinks)
+        if not full_subpackage_name:
+            resolved.append(None)
+            continue
+        resolved.append(full_subpackage_name + "." + module_name)
+        subpackage_names = groups.setdefault(dirname, [])
+        if full_subpackage_name not in subpackage_names:
+            subpackage_names.append(full_subpackage_name)
+        if is_module_object:
+            module.__package__ = full_subpackage_name
+
+    for dirname, subpackage_names in groups.items():
+        _import_subpackages(dirname, subpackage_names)
 
+    for module, full_module_name in zip(modules, resolved):
+        if full_module_name is not None and hasattr(module, "__package__"):
+            sys.modules.setdefault(full_module_name, module)
+    return resolved
@@ -46,6 +46,77 @@ do
    echo
    echo "Test package name shadowed by module with the same name."
    $p ./shadow_package/shadow_package.py
+
+   echo
+   echo "Test setting the package context of other modules and files."
+   $p ./test_init_module.py
+
+   echo
+   echo "Test packages with only compiled __init__ files."
+   $p ./test_compiled_init.py
+
+   echo
+   echo "Test implicit namespace packages."
+   $p ./test_namespace_package.py
+
+   echo
+   echo "Test tracing the memory allocated by the package import."
+   $p ./toplevel/subdir/test_memory_report.py
+
+   echo
+   echo "Test pickling script objects by their package-qualified name."
+   $p ./toplevel/subdir/test_pickle_main.py
+
+   echo
+   echo "Test pickling by qualified name with set_package_attribute copied into the package."
+   $p ./test_pickle_copied_module.py
+
+   echo
+   echo "Test importing the package on a background thread."
+   $p ./toplevel/subdir/subsubdir/test_background_init.py
+
+   echo
+   echo "Test a background import of a package whose __init__ imports a submodule."
+   $p ./test_background_deadlock.py
+
+   echo
+   echo "Test profile-guided reordering of sys.path."
+   $p ./test_syspath_profile.py
+
+   echo
+   echo "Test lazily importing a sibling module."
+   $p ./toplevel/subdir/test_lazy_import.py
+
+   echo
+   echo "Test preferring an installed copy of the package."
+   $p ./test_prefer_installed.py
+
+   echo
+   echo "Test detecting directories on high-latency filesystems."
+   $p ./test_high_latency_fs.py
+
+   echo
+   echo "Test at subsubdir level, checking the directories concurrently."
+   SET_PACKAGE_ATTRIBUTE_HIGH_LATENCY_FS=1 $p ./toplevel/subdir/subsubdir/test_in_subsubdir.py
+
+   echo
+   echo "Test preparing for a pre-forking server."
+   $p ./toplevel/subdir/test_prefork.py
+
+   echo
+   echo "Test a symlinked package tree without resolving the symlinks."
+   $p ./test_symlinked_tree.py
+
+   echo
+   echo "Test restoring the import state between tests run by the pytest plugin."
+   $p ./test_import_state_snapshot.py
 done
 
+if python -c "import pytest" 2>/dev/null
+then
+   echo
+   echo "Test running all the test scripts in-process with the pytest plugin."
+   python -m pytest -p pytest_set_package_attribute -o script_test_files="test_*.py" -q .
+fi
+
 echo
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""
+
+Run by `test_syspath_profile.py` with the name of a `sys.path` profile file as its
+argument.  The script's directory is kept on `sys.path`, where its module name
+shadows the package name, to check that reordering `sys.path` never changes
+which entry serves an import.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+import sys
+
+if __name__ == "__main__":
+    import set_package_attribute
+    set_package_attribute.init(modify_syspath=False, syspath_profile=sys.argv[1])
+
+import shadow_package.dummy_module
+import shadow_package.shadow_package
+assert shadow_package.__path__
+
+realpaths = [os.path.realpath(os.path.abspath(path)) for path in sys.path]
+script_dir = os.path.dirname(os.path.realpath(os.path.abspath(__file__)))
+src_dir = os.path.dirname(os.path.realpath(set_package_attribute.__file__))
+root_dir = os.path.dirname(script_dir)
+assert realpaths[0] == src_dir, realpaths # The hottest entry in the profile.
+assert realpaths.index(script_dir) < realpaths.index(root_dir) # Shadowing kept.
+
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for the tests which build a package tree in a temporary directory and
+run a script from it in a separate interpreter.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+from contextlib import contextmanager
+
+import set_package_attribute
+
+src_dir = os.path.dirname(os.path.abspath(set_package_attribute.__file__))
+
+@contextmanager
+def temp_dir():
+    """Yield the real path of a new temporary directory, which is removed
+    afterward."""
+    tmp_dir = os.path.realpath(tempfile.mkdtemp())
+    try:
+        yield tmp_dir
+    finally:
+        shutil.rmtree(tmp_dir)
+
+def write_file(pathname, contents=""):
+    """Write the string `contents` to the file `pathname`, first creating its
+    directory if necessary."""
+    dirname = os.path.dirname(pathname)
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    with open(pathname, "w") as f:
+        f.write(contents)
+
+def run_script(script_file, args=(), pythonpath=(), with_src_dir=True, stderr=None):
+    """Run `script_file` with the arguments `args` in a separate interpreter, which
+    can import the directories in `pythonpath`, and `set_package_attribute` unless
+    `with_src_dir` is false.  The script's standard error goes to the file object
+    `stderr`, if given.  A `subprocess.CalledProcessError` is raised if the script
+    fails."""
+    env = dict(os.environ)
+    pythonpath = ([src_dir] if with_src_dir else []) + list(pythonpath)
+    env["PYTHONPATH"] = os.pathsep.join(pythonpath)
+    subprocess.check_call([sys.executable, script_file] + list(args), env=env,
+                          stderr=stderr)
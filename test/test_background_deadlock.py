@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Test `init(background=True)` with a package whose `__init__.py` imports a
+submodule which the script also imports, and which imports from the package in
+turn.  Without waiting for the whole background import the two threads would
+deadlock on the import locks of the package and the submodule.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+
+from temp_tree import temp_dir, write_file, run_script
+
+init_file = """
+import time
+time.sleep(0.3) # Let the script reach its own import first.
+CONFIG = 42
+from .sub import mod
+"""
+
+mod_file = """
+from .. import CONFIG
+x = CONFIG
+"""
+
+script = """
+import set_package_attribute
+set_package_attribute.init(background=True)
+
+from .mod import x
+assert x == 42
+set_package_attribute.wait_for_background_init() # Raises any deadlock error.
+"""
+
+failing_init_file = """
+import time
+time.sleep(0.3)
+raise ValueError("background failure")
+"""
+
+failing_script = """
+import set_package_attribute
+set_package_attribute.init(background=True)
+
+try:
+    from . import mod
+except ValueError as e:
+    assert str(e) == "background failure"
+else:
+    raise AssertionError("The background import failure was not re-raised.")
+"""
+
+unreported_script = """
+import set_package_attribute
+set_package_attribute.init(background=True)
+"""
+
+with temp_dir() as tmp_dir:
+    pkg_dir = os.path.join(tmp_dir, "deadlock_pkg")
+    write_file(os.path.join(pkg_dir, "__init__.py"), init_file)
+    write_file(os.path.join(pkg_dir, "sub", "__init__.py"))
+    write_file(os.path.join(pkg_dir, "sub", "mod.py"), mod_file)
+    write_file(os.path.join(pkg_dir, "sub", "script.py"), script)
+    run_script(os.path.join(pkg_dir, "sub", "script.py"))
+
+    pkg_dir = os.path.join(tmp_dir, "failing_pkg")
+    write_file(os.path.join(pkg_dir, "__init__.py"), failing_init_file)
+    write_file(os.path.join(pkg_dir, "mod.py"))
+    write_file(os.path.join(pkg_dir, "script.py"), failing_script)
+    write_file(os.path.join(pkg_dir, "unreported.py"), unreported_script)
+    run_script(os.path.join(pkg_dir, "script.py"))
+
+    # The failure of a background import which is never waited for is warned about.
+    stderr_file = os.path.join(tmp_dir, "stderr.txt")
+    with open(stderr_file, "w") as stderr:
+        run_script(os.path.join(pkg_dir, "unreported.py"), stderr=stderr)
+    with open(stderr_file) as f:
+        assert "background failure" in f.read()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Test a script inside packages which only have sourceless, compiled `__init__.pyc`
+files.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+import py_compile
+
+from temp_tree import temp_dir, write_file, run_script
+
+script = """
+import set_package_attribute
+set_package_attribute.init()
+assert __package__ == "compiled_pkg.subdir", __package__
+from . import sibling_module
+assert sibling_module.value
+"""
+
+with temp_dir() as tmp_dir:
+    subdir = os.path.join(tmp_dir, "compiled_pkg", "subdir")
+    for init_dir in [os.path.dirname(subdir), subdir]:
+        init_file = os.path.join(init_dir, "__init__.py")
+        write_file(init_file, "value = True\n")
+        py_compile.compile(init_file, cfile=init_file + "c", doraise=True)
+        os.remove(init_file)
+    write_file(os.path.join(subdir, "sibling_module.py"), "value = True\n")
+    write_file(os.path.join(subdir, "compiled_script.py"), script)
+
+    run_script(os.path.join(subdir, "compiled_script.py"))
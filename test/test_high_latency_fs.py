@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Test the automatic detection of directories on high-latency filesystems, with a
+fake mount table in place of `/proc/mounts`.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+
+import set_package_attribute
+from set_package_attribute import _on_high_latency_fs, _unescape_mount_point
+
+assert _unescape_mount_point("/mnt/my\\040disk") == "/mnt/my disk"
+assert _unescape_mount_point("/mnt/plain") == "/mnt/plain"
+
+saved_env_value = os.environ.pop(set_package_attribute.HIGH_LATENCY_FS_ENV_VAR, None)
+saved_mount_table = set_package_attribute._mount_table
+try:
+    set_package_attribute._mount_table = [
+            ("/", "ext4"),
+            ("/mnt/nfs", "nfs4"),
+            ("/mnt/nfsx", "ext4"),
+            ("/mnt/nfs/local", "tmpfs"),
+            (_unescape_mount_point("/mnt/my\\040disk"), "fuse.sshfs"),
+            ("/mnt/fuseblk", "fuseblk"),
+            ]
+
+    assert set_package_attribute._MIN_HIGH_LATENCY_DEPTH == 4
+    assert _on_high_latency_fs("/mnt/nfs/a/b")
+    assert _on_high_latency_fs("/mnt/nfs/a/b/")
+    assert not _on_high_latency_fs("/mnt/nfs/a") # Too shallow to be worth it.
+    assert not _on_high_latency_fs("/mnt/nfsx/a/b") # Not under /mnt/nfs.
+    assert not _on_high_latency_fs("/mnt/nfs/local/b") # The longest prefix wins.
+    assert _on_high_latency_fs("/mnt/my disk/a/b") # Any fuse.* type.
+    assert not _on_high_latency_fs("/mnt/fuseblk/a/b") # Only a local block device.
+    assert not _on_high_latency_fs("/home/user/a/b")
+
+    os.environ[set_package_attribute.HIGH_LATENCY_FS_ENV_VAR] = "1"
+    assert _on_high_latency_fs("/home")
+    os.environ[set_package_attribute.HIGH_LATENCY_FS_ENV_VAR] = "no"
+    assert not _on_high_latency_fs("/mnt/nfs/a/b")
+finally:
+    set_package_attribute._mount_table = saved_mount_table
+    os.environ.pop(set_package_attribute.HIGH_LATENCY_FS_ENV_VAR, None)
+    if saved_env_value is not None:
+        os.environ[set_package_attribute.HIGH_LATENCY_FS_ENV_VAR] = saved_env_value
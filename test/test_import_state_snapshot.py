@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Test that `ImportStateSnapshot.restore` in the pytest plugin puts back the import
+state.  The test is skipped if pytest is not installed.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+import sys
+
+from temp_tree import temp_dir, write_file
+
+try:
+    import pytest_set_package_attribute
+except ImportError:
+    print("Skipping the test since pytest is not installed.")
+    sys.exit(0)
+
+import set_package_attribute
+from pytest_set_package_attribute import ImportStateSnapshot, spawn
+
+class DummyFinder(object):
+    def find_spec(self, name, path=None, target=None):
+        return None
+
+with temp_dir() as tmp_dir:
+    root_dir = os.path.join(tmp_dir, "root")
+    outside_dir = os.path.join(tmp_dir, "outside")
+    write_file(os.path.join(root_dir, "snapshot_inside_mod.py"))
+    write_file(os.path.join(outside_dir, "snapshot_outside_mod.py"))
+
+    saved_path = list(sys.path)
+    saved_meta_path = list(sys.meta_path)
+    saved_deleted_value = set_package_attribute.deleted_sys_path_0_value
+    saved_mount_table = set_package_attribute._mount_table
+    saved_get_preparation_data = spawn.get_preparation_data
+
+    snapshot = ImportStateSnapshot(root_dir)
+    sys.path[:0] = [root_dir, outside_dir]
+    sys.meta_path.append(DummyFinder())
+    import snapshot_inside_mod
+    import snapshot_outside_mod
+    set_package_attribute.deleted_sys_path_0_value = "/some/dir"
+    set_package_attribute._mount_table = [("/", "nfs")]
+    spawn.get_preparation_data = lambda name: {}
+    snapshot.restore()
+
+    assert "snapshot_inside_mod" not in sys.modules # Loaded from inside root_dir.
+    assert sys.modules["snapshot_outside_mod"] is snapshot_outside_mod # Kept.
+    assert sys.path == saved_path
+    assert sys.meta_path == saved_meta_path
+    assert set_package_attribute.deleted_sys_path_0_value == saved_deleted_value
+    assert set_package_attribute._mount_table is saved_mount_table
+    assert spawn.get_preparation_data is saved_get_preparation_data
+    del sys.modules["snapshot_outside_mod"]
@@ -27,6 +27,7 @@ assert subdir_imp_1.value
 assert subdir_imp_1 is subdir_imp_2
 
 from toplevel.subdir import test_in_subdir # Import does within-package imports.
+from toplevel.subdir import test_lazy_import # Import does a lazy import.
 
 # Import from subsubdir level.
 
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Test `init_module` and `init_modules`, as used by a plugin host which runs files
+from inside packages with `exec` or `runpy.run_path`.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+import sys
+import types
+import runpy
+
+import set_package_attribute
+
+test_dir = os.path.dirname(os.path.abspath(__file__))
+subsubdir_script = os.path.join(test_dir, "toplevel", "subdir", "subsubdir",
+                                "test_in_subsubdir.py")
+sibling_module = os.path.join(test_dir, "toplevel", "subdir", "subsubdir_sibling",
+                              "subsubdir_sibling_module.py")
+
+# A module object, run with exec.
+
+plugin = types.ModuleType("plugin")
+plugin.__file__ = sibling_module
+name = set_package_attribute.init_module(plugin)
+assert name == "toplevel.subdir.subsubdir_sibling.subsubdir_sibling_module"
+assert plugin.__package__ == "toplevel.subdir.subsubdir_sibling"
+assert sys.modules[name] is plugin
+with open(sibling_module) as f:
+    exec(compile(f.read(), sibling_module, "exec"), plugin.__dict__)
+assert plugin.value
+
+# A pathname, with the returned name used to run the file.
+
+name = set_package_attribute.init_module(subsubdir_script)
+assert name == "toplevel.subdir.subsubdir.test_in_subsubdir"
+assert "toplevel.subdir.subsubdir" in sys.modules
+result = runpy.run_path(subsubdir_script, run_name=name)
+assert result["__package__"] == "toplevel.subdir.subsubdir"
+
+# A previously-set __package__ is left unchanged.
+
+assert set_package_attribute.init_module(plugin) is None
+
+# A module object with no file yet.
+
+fileless_plugin = types.ModuleType("fileless_plugin")
+assert set_package_attribute.init_module(fileless_plugin) is None
+assert fileless_plugin.__package__ is None
+
+# Files which are not in a package.
+
+assert set_package_attribute.init_module(os.path.abspath(__file__)) is None
+
+# The batch version.
+
+names = set_package_attribute.init_modules([
+    os.path.join(test_dir, "toplevel", "toplevel_module.py"),
+    os.path.join(test_dir, "toplevel", "subdir", "subdir_module.py"),
+    os.path.join(test_dir, "toplevel", "subdir", "subsubdir", "subsubdir_module.py"),
+    os.path.abspath(__file__)])
+assert names == ["toplevel.toplevel_module",
+                 "toplevel.subdir.subdir_module",
+                 "toplevel.subdir.subsubdir.subsubdir_module",
+                 None]
+
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Test scripts inside implicit namespace packages (PEP 420), which have no
+`__init__.py` files, with the root directory passed explicitly and on
+`sys.path`.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+
+from temp_tree import temp_dir, write_file, run_script
+
+roots_script = """
+import sys
+import set_package_attribute
+set_package_attribute.init(namespace_packages=True, roots=[sys.argv[1]])
+assert __package__ == "ns_top.ns_mid", __package__
+from . import sibling_module
+assert sibling_module.value
+"""
+
+syspath_script = """
+import set_package_attribute
+set_package_attribute.init(namespace_packages=True)
+assert __package__ == "ns_top.ns_mid", __package__
+from .sibling_module import value
+assert value
+"""
+
+with temp_dir() as tmp_dir:
+    ns_mid = os.path.join(tmp_dir, "ns_top", "ns_mid")
+    write_file(os.path.join(ns_mid, "sibling_module.py"), "value = True\n")
+    write_file(os.path.join(ns_mid, "roots_script.py"), roots_script)
+    write_file(os.path.join(ns_mid, "syspath_script.py"), syspath_script)
+
+    run_script(os.path.join(ns_mid, "roots_script.py"), [tmp_dir])
+    run_script(os.path.join(ns_mid, "syspath_script.py"), pythonpath=[tmp_dir])
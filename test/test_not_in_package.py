@@ -4,9 +4,15 @@ Test the import of `set_package_attribute` when not inside a package.
 """
 
 from __future__ import print_function, division, absolute_import
+import sys
 
 import set_package_attribute
 set_package_attribute.init()
 
 assert __package__ is None
 
+# Absolute names are still preloaded outside of a package.
+set_package_attribute.init(prefork=True, preload=["json"])
+assert __package__ is None
+assert "json" in sys.modules
+
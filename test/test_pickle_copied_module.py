@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Test `init(pickle_by_qualified_name=True)` with spawned `multiprocessing` workers
+when `set_package_attribute` is not installed but copied next to the script, so
+that the workers cannot import it until the script's `sys.path` is applied.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+import shutil
+
+from temp_tree import temp_dir, write_file, run_script, src_dir
+
+script = """
+import multiprocessing
+
+if __name__ == "__main__":
+    import set_package_attribute
+    set_package_attribute.init(pickle_by_qualified_name=True)
+
+def double(x):
+    return 2 * x
+
+if __name__ == "__main__":
+    set_package_attribute.qualify_main_names()
+    assert double.__module__ == "copy_pkg.run"
+    pool = multiprocessing.get_context("spawn").Pool(1)
+    try: # A timeout, since the pool restarts workers which die while starting.
+        assert pool.map_async(double, [1, 2]).get(timeout=60) == [2, 4]
+    finally:
+        pool.terminate()
+        pool.join()
+"""
+
+with temp_dir() as tmp_dir:
+    pkg_dir = os.path.join(tmp_dir, "copy_pkg")
+    write_file(os.path.join(pkg_dir, "__init__.py"))
+    write_file(os.path.join(pkg_dir, "run.py"), script)
+    shutil.copy(os.path.join(src_dir, "set_package_attribute.py"), pkg_dir)
+
+    run_script(os.path.join(pkg_dir, "run.py"), with_src_dir=False)
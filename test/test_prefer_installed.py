@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+Test preferring an installed copy of a package over the source tree containing
+the script, with and without the installed copy on `sys.path`.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+
+from temp_tree import temp_dir, write_file, run_script
+
+script = """
+import sys
+import set_package_attribute
+set_package_attribute.init(prefer_installed=True)
+print(set_package_attribute.package_copy_report)
+assert __package__ == "copied_pkg.subdir", __package__
+from . import sibling_module
+assert sibling_module.value == sys.argv[1], sibling_module.value
+assert set_package_attribute.package_copy_report.startswith("Using the installed") == (
+        sys.argv[1] == "installed")
+"""
+
+with temp_dir() as tmp_dir:
+    for copy in ["source", "installed"]:
+        subdir = os.path.join(tmp_dir, copy, "copied_pkg", "subdir")
+        for init_dir in [os.path.dirname(subdir), subdir]:
+            write_file(os.path.join(init_dir, "__init__.py"))
+        write_file(os.path.join(subdir, "sibling_module.py"),
+                   "value = {0!r}\n".format(copy))
+    script_file = os.path.join(tmp_dir, "source", "copied_pkg", "subdir", "script.py")
+    write_file(script_file, script)
+
+    run_script(script_file, ["installed"],
+               pythonpath=[os.path.join(tmp_dir, "installed")])
+    run_script(script_file, ["source"])
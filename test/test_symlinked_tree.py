@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Test finding the package in the logical, symlinked path space of a script, with a
+deployment layout where `current` is a symlink to `releases/1`.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+
+from temp_tree import temp_dir, write_file, run_script
+
+script = """
+import os
+import sys
+import set_package_attribute
+set_package_attribute.init(resolve_symlinks=False)
+assert __package__ == "linked_pkg.subdir", __package__
+current_dir = sys.argv[1]
+
+from . import sibling_module
+import linked_pkg.subdir.sibling_module as sibling_imp_2 # Through current on sys.path.
+assert sibling_module is sibling_imp_2
+assert sibling_module.__file__.startswith(current_dir + os.sep), sibling_module.__file__
+assert set_package_attribute.find_aliased_modules() == []
+
+# Load the same file again under another name, which the check finds.
+sys.path.insert(0, os.path.dirname(sibling_module.__file__))
+import sibling_module as sibling_imp_3
+del sys.path[0]
+assert set_package_attribute.find_aliased_modules() == [
+                            ["linked_pkg.subdir.sibling_module", "sibling_module"]]
+del sys.modules["sibling_module"]
+"""
+
+with temp_dir() as tmp_dir:
+    subdir = os.path.join(tmp_dir, "releases", "1", "linked_pkg", "subdir")
+    for init_dir in [os.path.dirname(subdir), subdir]:
+        write_file(os.path.join(init_dir, "__init__.py"))
+    write_file(os.path.join(subdir, "sibling_module.py"), "value = True\n")
+    write_file(os.path.join(subdir, "script.py"), script)
+    current_dir = os.path.join(tmp_dir, "current")
+    os.symlink(os.path.join("releases", "1"), current_dir)
+
+    run_script(os.path.join(current_dir, "linked_pkg", "subdir", "script.py"),
+               [current_dir], pythonpath=[current_dir])
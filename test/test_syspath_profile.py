@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Test the profile-guided reordering of `sys.path`.  The script
+`shadow_package/profile_script.py` is run in separate interpreters with a profile
+file in a temporary directory.
+"""
+
+from __future__ import print_function, division, absolute_import
+import os
+import json
+
+from temp_tree import temp_dir, run_script, src_dir
+
+test_dir = os.path.dirname(os.path.realpath(os.path.abspath(__file__)))
+src_dir = os.path.realpath(src_dir)
+
+with temp_dir() as tmp_dir:
+    profile_file = os.path.join(tmp_dir, "syspath_profile.json")
+    with open(profile_file, "w") as f: # Entries of the wrong types are dropped.
+        json.dump({src_dir: 1000, test_dir: "x", "<flag>": True, "<none>": None}, f)
+
+    for run in range(2): # The test directory goes before src_dir on sys.path.
+        run_script(os.path.join(test_dir, "shadow_package", "profile_script.py"),
+                   args=[profile_file], pythonpath=[test_dir, src_dir],
+                   with_src_dir=False)
+
+    with open(profile_file) as f:
+        hits = json.load(f)
+    assert hits[src_dir] == 1002, hits # Served set_package_attribute on both runs.
+    assert hits[test_dir] == 2, hits # Served shadow_package on both runs.
+    assert not set(hits) & {"<flag>", "<none>"}, hits
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+
+Imported lazily by `test_lazy_import.py`.  Records in `subdir_module` when it is
+actually loaded.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from . import subdir_module
+subdir_module.lazy_module_loaded = True
+
+value=True
+
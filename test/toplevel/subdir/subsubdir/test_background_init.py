@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+
+Test importing the package on a background thread, from the subsubdir level.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+if __name__ == "__main__":
+    import set_package_attribute
+    set_package_attribute.init(background=True)
+    assert __package__ == "toplevel.subdir.subsubdir"
+
+    import argparse # Startup work overlapping the package import.
+    argparse.ArgumentParser().parse_args([])
+
+# Intra-package imports wait for the modules they need.
+
+from ... import toplevel_module as top_imp_1
+from toplevel import toplevel_module as top_imp_2
+assert top_imp_1 is top_imp_2
+
+from ..subsubdir_sibling import subsubdir_sibling_module as sibling_imp_1
+import toplevel.subdir.subsubdir_sibling.subsubdir_sibling_module as sibling_imp_2
+assert sibling_imp_1 is sibling_imp_2
+
+from . import subsubdir_module
+assert subsubdir_module.value
+
+if __name__ == "__main__":
+    import sys
+    set_package_attribute.wait_for_background_init()
+    assert "toplevel.subdir.subsubdir" in sys.modules
+    assert sys.modules["__main__"] is sys.modules[
+            "toplevel.subdir.subsubdir.test_background_init"]
+
+    # Recursive import, just to test.
+    import toplevel.subdir.subsubdir.test_background_init
+    assert sys.modules["__main__"] is sys.modules[
+            "toplevel.subdir.subsubdir.test_background_init"]
+
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+
+Test lazily importing a sibling module, from the subdir level.  This is run as a
+script and also imported as part of the package.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+import set_package_attribute
+if __name__ == "__main__":
+    set_package_attribute.init()
+
+from . import subdir_module
+
+lazy_module = set_package_attribute.lazy_import(".lazy_module")
+assert not getattr(subdir_module, "lazy_module_loaded", False)
+assert lazy_module.value # The first attribute access loads the module.
+assert subdir_module.lazy_module_loaded
+
+from . import lazy_module as lazy_imp_2
+import toplevel.subdir.lazy_module as lazy_imp_3
+assert lazy_module is lazy_imp_2 is lazy_imp_3
+assert set_package_attribute.lazy_import(".lazy_module") is lazy_module
+
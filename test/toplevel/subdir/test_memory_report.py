@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+
+Test tracing the memory allocated by importing the package, from the subdir level.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+import warnings
+
+if __name__ == "__main__":
+    import set_package_attribute
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        set_package_attribute.init(trace_memory=True,
+                                   memory_budgets={"toplevel": 1, "other_package": 1})
+
+    report = set_package_attribute.import_memory_report
+    print(report.format())
+    assert report.total == sum(report.module_sizes.values())
+    assert report.package_size("toplevel") > 0
+    assert [budget[0] for budget in report.over_budget({"toplevel": 1})] == ["toplevel"]
+    assert len(caught) == 1 and "'toplevel'" in str(caught[0].message)
+
+from . import subdir_module
+assert subdir_module.value
+
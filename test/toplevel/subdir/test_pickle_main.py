@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+
+Test pickling objects defined in a script by the script's package-qualified module
+name, from the subdir level.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+import sys
+import pickle
+
+# Count the runs of the module body in this process, somewhere which outlives the
+# module object.
+sys.test_pickle_main_body_runs = getattr(sys, "test_pickle_main_body_runs", 0) + 1
+
+if __name__ == "__main__":
+    import set_package_attribute
+    set_package_attribute.init(pickle_by_qualified_name=True)
+
+class Point(object):
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+    @staticmethod
+    def origin():
+        return Point(0, 0)
+
+def norm1(point):
+    return abs(point.x) + abs(point.y)
+
+def body_runs(_):
+    return sys.test_pickle_main_body_runs
+
+if __name__ == "__main__":
+    import multiprocessing
+    assert __spec__.name == "toplevel.subdir.test_pickle_main"
+    assert sys.modules["__main__"] is sys.modules["toplevel.subdir.test_pickle_main"]
+    assert Point.__module__ == "__main__" # Defined after init.
+
+    set_package_attribute.qualify_main_names()
+    assert Point.__module__ == "toplevel.subdir.test_pickle_main"
+    assert Point.origin.__module__ == "toplevel.subdir.test_pickle_main"
+    assert norm1.__module__ == "toplevel.subdir.test_pickle_main"
+
+    pickled = pickle.dumps((Point(1, -2), norm1))
+    assert b"toplevel.subdir.test_pickle_main" in pickled
+    assert b"__main__" not in pickled
+    point, function = pickle.loads(pickled)
+    assert type(point) is Point and function is norm1
+
+    # Spawned workers import the module by its qualified name, running its body
+    # only once, and the package directory is only put on their sys.path.
+    path_before = list(sys.path)
+    context = multiprocessing.get_context("spawn")
+    pool = context.Pool(1)
+    try:
+        assert pool.map(norm1, [Point(1, -2), Point(3, 4)]) == [3, 7]
+        assert pool.map(body_runs, [None]) == [1]
+    finally:
+        pool.close()
+        pool.join()
+    assert sys.path == path_before
+    assert sys.test_pickle_main_body_runs == 1
+
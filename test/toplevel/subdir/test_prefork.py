@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+
+Test preparing for a pre-forking server, from the subdir level.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+import gc
+import os
+import sys
+
+if __name__ == "__main__":
+    import set_package_attribute
+
+    # The garbage collector is enabled again even if a preload import fails.
+    try:
+        set_package_attribute.init(prefork=True, preload=["no_such_module_xyz"])
+    except ImportError:
+        pass
+    else:
+        assert False, "ImportError not raised"
+    assert gc.isenabled()
+
+    # With __package__ now set, only the preloading and freezing are done again.
+    set_package_attribute.init(prefork=True, preload=[".subdir_module", "json"])
+
+    assert "toplevel.subdir.subdir_module" in sys.modules
+    assert "json" in sys.modules
+    assert gc.isenabled()
+    if hasattr(gc, "get_freeze_count"):
+        assert gc.get_freeze_count() > 0
+
+    if hasattr(os, "fork") and os.path.exists("/proc/self/smaps_rollup"):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0: # The child waits for the parent to read its memory use.
+            os.close(write_fd)
+            os.read(read_fd, 1)
+            os._exit(0)
+        try:
+            os.close(read_fd)
+            report = set_package_attribute.forked_memory_report([pid])
+            shared, private = report[pid]
+            print("Forked child memory: {0:,d} B shared, {1:,d} B private".format(
+                                                                    shared, private))
+            assert shared > private
+        finally:
+            os.close(write_fd)
+            os.waitpid(pid, 0)
+
+    if hasattr(gc, "unfreeze"):
+        gc.unfreeze()
+
+from . import subdir_module
+assert subdir_module.value
+